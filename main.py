@@ -1,18 +1,23 @@
+import io
 import os
-import tempfile
+import re
+import json
 import subprocess
 import logging
-import io
+import tempfile
 import threading
 import time
+import functools
+import collections
+import concurrent.futures
 import requests
 
 from flask import Flask, request, jsonify
 from google.oauth2 import service_account
 from google.cloud import speech_v1p1beta1 as speech
 from googleapiclient.discovery import build
-from googleapiclient.http import MediaIoBaseDownload
 import google.auth  # For default credentials
+from google.auth.transport.requests import AuthorizedSession, Request
 from google.cloud import storage
 
 # Configure logging
@@ -20,17 +25,109 @@ logging.basicConfig(level=logging.INFO)
 
 app = Flask(__name__)
 
-# Load credentials: use service account file if present; otherwise, use default credentials.
 SERVICE_ACCOUNT_PATH = os.getenv("GOOGLE_APPLICATION_CREDENTIALS", "service-account.json")
-if os.path.exists(SERVICE_ACCOUNT_PATH):
-    credentials = service_account.Credentials.from_service_account_file(SERVICE_ACCOUNT_PATH)
-else:
-    credentials, _ = google.auth.default()
 
-# Initialize APIs.
-drive_service = build('drive', 'v3', credentials=credentials)
-speech_client = speech.SpeechClient(credentials=credentials)
-storage_client = storage.Client(credentials=credentials)
+# Clients are built lazily (and cached) so each pool worker process
+# constructs its own instances; gRPC channels and discovery clients do not
+# survive the fork into worker processes.
+@functools.lru_cache(maxsize=None)
+def get_credentials():
+    """Use the service account file if present; otherwise, default credentials."""
+    if os.path.exists(SERVICE_ACCOUNT_PATH):
+        return service_account.Credentials.from_service_account_file(SERVICE_ACCOUNT_PATH)
+    creds, _ = google.auth.default()
+    return creds
+
+@functools.lru_cache(maxsize=None)
+def get_drive_service():
+    return build('drive', 'v3', credentials=get_credentials())
+
+@functools.lru_cache(maxsize=None)
+def get_speech_client():
+    return speech.SpeechClient(credentials=get_credentials())
+
+@functools.lru_cache(maxsize=None)
+def get_storage_client():
+    return storage.Client(credentials=get_credentials())
+
+@functools.lru_cache(maxsize=None)
+def get_whisper_model():
+    """Load the local Whisper model once per worker (TRANSCRIBER=whisper).
+
+    Weights default to INT8 quantization, which halves the bytes moved per
+    token on the memory-bandwidth-bound decode with negligible accuracy loss
+    for English. A CTranslate2 directory pre-converted with
+    `ct2-transformers-converter --model openai/whisper-small.en
+    --quantization int8_float16` and baked into the image at
+    models/whisper-small-int8 is picked up automatically.
+    """
+    from faster_whisper import WhisperModel  # Optional dependency.
+    device = os.getenv("WHISPER_DEVICE", "cuda")
+    model = os.getenv("WHISPER_MODEL", "")
+    if not model:
+        model = "models/whisper-small-int8" if os.path.isdir("models/whisper-small-int8") else "small.en"
+    # int8_float16 needs FP16-capable hardware; plain int8 roughly doubles
+    # encoder throughput on CPU-only instances.
+    default_compute = "int8_float16" if device == "cuda" else "int8"
+    return WhisperModel(
+        model,
+        device=device,
+        compute_type=os.getenv("WHISPER_COMPUTE", default_compute),
+    )
+
+@functools.lru_cache(maxsize=None)
+def get_auth_session():
+    """One AuthorizedSession per worker, so Drive media downloads reuse
+    pooled TLS connections instead of handshaking on every request."""
+    session = AuthorizedSession(get_credentials())
+    session.mount("https://", requests.adapters.HTTPAdapter(pool_maxsize=32))
+    return session
+
+def _prewarm():
+    """Pay the cold-start costs up front: metadata-server token fetch, the
+    Drive discovery-document GET, and the first speech RPC's TLS handshake.
+
+    Runs as the pool-worker initializer, so each worker warms its own
+    cached clients before taking its first task. It must not run in the
+    serving process: clients created there before the pool forks would be
+    inherited by the workers, and a used gRPC channel is not fork-safe.
+    """
+    if os.getenv("PREWARM", "1") != "1":
+        return
+    try:
+        creds = get_credentials()
+        if not creds.valid:
+            creds.refresh(Request())
+        get_drive_service().files().list(pageSize=1, fields="files(id)").execute()
+    except Exception:
+        logging.exception("Drive prewarm failed")
+    try:
+        config = speech.RecognitionConfig(
+            encoding=speech.RecognitionConfig.AudioEncoding.LINEAR16,
+            sample_rate_hertz=16000,
+            language_code="en-US"
+        )
+        get_speech_client().recognize(
+            config=config,
+            audio=speech.RecognitionAudio(content=b"\x00\x00")
+        )
+    except Exception:
+        # The result is irrelevant; the RPC only forces gRPC channel setup.
+        logging.info("Speech prewarm RPC completed (errors here are expected).")
+
+# Bounded pool for the heavy per-request work (ffmpeg, downloads, STT).
+# Worker processes have independent memory and no GIL contention with Flask,
+# and the pool size caps how many transcriptions run at once.
+EXECUTOR = concurrent.futures.ProcessPoolExecutor(
+    max_workers=int(os.getenv("WORKERS", "4")),
+    initializer=_prewarm
+)
+
+# Pool workers are forked lazily on the first submit; kick one off now so
+# the first worker spawns and prewarms at container start instead of on the
+# first user request.
+if os.getenv("PREWARM", "1") == "1":
+    EXECUTOR.submit(time.time)
 
 # Set your GCS bucket name if using asynchronous transcription.
 GCS_BUCKET = os.getenv("GCS_BUCKET", "new_bucket_make")  # Replace with your bucket name
@@ -38,6 +135,151 @@ GCS_BUCKET = os.getenv("GCS_BUCKET", "new_bucket_make")  # Replace with your buc
 # Set the webhook URL to which the transcript will be sent.
 WEBHOOK_URL = "https://hook.us2.make.com/hbc5ver5l4bquuf8fm0jrals3faw142d"
 
+# Matches both share-link forms: .../file/d/<id>/... and ...?id=<id>.
+FILE_ID_RE = re.compile(r"/file/d/([^/?#]+)|[?&]id=([^&#]+)")
+
+# Transcription backend: "google" (Cloud Speech-to-Text, the default) or
+# "whisper" (local faster-whisper model, no network round-trip; needs the
+# optional faster-whisper dependency and ideally a GPU).
+TRANSCRIBER = os.getenv("TRANSCRIBER", "google")
+
+# Transcripts are cached by the Drive file's MD5 checksum (returned for free
+# by the Drive metadata call), so repeated requests for the same video skip
+# the download/ffmpeg/STT pipeline entirely. A small in-memory LRU serves the
+# hot set; GCS holds the shared cache that survives restarts.
+TRANSCRIPT_CACHE_SIZE = 512
+_transcript_cache = collections.OrderedDict()
+_transcript_cache_lock = threading.Lock()
+
+def transcript_cache_get(md5):
+    """Return a cached transcript for the given content hash, or None."""
+    with _transcript_cache_lock:
+        if md5 in _transcript_cache:
+            _transcript_cache.move_to_end(md5)
+            return _transcript_cache[md5]
+    try:
+        blob = get_storage_client().bucket(GCS_BUCKET).blob(f"transcripts/{md5}.json")
+        if blob.exists():
+            transcript = json.loads(blob.download_as_bytes())["transcript"]
+            transcript_cache_put(md5, transcript, persist=False)
+            return transcript
+    except Exception:
+        logging.exception("Failed to read transcript cache from GCS")
+    return None
+
+def transcript_cache_put(md5, transcript, persist=True):
+    """Store a transcript in the LRU (evicting the oldest) and, optionally, GCS."""
+    with _transcript_cache_lock:
+        _transcript_cache[md5] = transcript
+        _transcript_cache.move_to_end(md5)
+        while len(_transcript_cache) > TRANSCRIPT_CACHE_SIZE:
+            _transcript_cache.popitem(last=False)
+    if persist:
+        try:
+            blob = get_storage_client().bucket(GCS_BUCKET).blob(f"transcripts/{md5}.json")
+            blob.upload_from_string(
+                json.dumps({"transcript": transcript}),
+                content_type="application/json"
+            )
+        except Exception:
+            logging.exception("Failed to write transcript cache to GCS")
+
+def probe_audio_stream(path):
+    """Return (codec_name, sample_rate, channels) of the first audio stream, or None."""
+    try:
+        probe = subprocess.run(
+            ["ffprobe", "-v", "error", "-select_streams", "a:0",
+             "-show_entries", "stream=codec_name,sample_rate,channels",
+             "-of", "json", path],
+            check=True, capture_output=True
+        )
+        streams = json.loads(probe.stdout).get("streams")
+        if streams:
+            stream = streams[0]
+            return (
+                stream.get("codec_name"),
+                int(stream.get("sample_rate", 0)),
+                int(stream.get("channels", 0)),
+            )
+    except Exception:
+        logging.exception("ffprobe failed; falling back to re-encoding")
+    return None
+
+# Streaming recognition is limited to roughly five minutes of audio, so
+# longer videos go through GCS + long_running_recognize instead. PCM is fed
+# to the streaming API in one-second chunks (16000 Hz * 2 bytes).
+STREAMING_LIMIT_SECS = 290
+STREAMING_CHUNK_BYTES = 32000
+
+# Videos above this size are downloaded with concurrent range requests,
+# which saturates the NIC far better than a single serial HTTP stream.
+PARALLEL_DOWNLOAD_THRESHOLD = 32 * 1024 * 1024
+DOWNLOAD_WORKERS = 8
+DOWNLOAD_CHUNK_SIZE = 16 * 1024 * 1024
+
+# Chunk size for resumable uploads of extracted audio to GCS.
+GCS_UPLOAD_CHUNK_SIZE = 16 * 1024 * 1024
+
+class PipeAudioReader(io.RawIOBase):
+    """Raw reader over ffmpeg's stdout pipe that fills caller buffers in place.
+
+    BufferedReader copies pipe data through its own internal buffer before
+    handing it to the uploader. Reading with os.readv straight into the
+    destination buffer keeps a single kernel-to-userland copy per byte —
+    the closest Python gets to splice(2) when the sink is a TLS socket —
+    and looping until the buffer is full keeps the resumable upload's
+    chunks at their full size despite the short reads a pipe delivers.
+
+    The resumable-upload machinery calls tell() before and during an
+    unknown-size upload, which a pipe cannot answer, so the reader tracks
+    a monotonic position: the count of bytes handed out so far.
+    """
+
+    def __init__(self, fd):
+        self._fd = fd
+        self._pos = 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return False
+
+    def tell(self):
+        return self._pos
+
+    def readinto(self, buf):
+        view = memoryview(buf)
+        filled = 0
+        while filled < len(view):
+            n = os.readv(self._fd, [view[filled:]])
+            if n == 0:
+                break
+            filled += n
+        self._pos += filled
+        return filled
+
+def download_ranges(session, media_url, size, dest_path):
+    """Download a Drive media URL into dest_path using parallel range GETs."""
+    fd = os.open(dest_path, os.O_WRONLY | os.O_CREAT, 0o600)
+    try:
+        os.ftruncate(fd, size)
+
+        def fetch_range(lo, hi):
+            resp = session.get(media_url, headers={"Range": f"bytes={lo}-{hi}"})
+            resp.raise_for_status()
+            os.pwrite(fd, resp.content, lo)
+
+        ranges = [
+            (lo, min(lo + DOWNLOAD_CHUNK_SIZE, size) - 1)
+            for lo in range(0, size, DOWNLOAD_CHUNK_SIZE)
+        ]
+        with concurrent.futures.ThreadPoolExecutor(max_workers=DOWNLOAD_WORKERS) as pool:
+            for future in [pool.submit(fetch_range, lo, hi) for lo, hi in ranges]:
+                future.result()
+    finally:
+        os.close(fd)
+
 def process_transcription(data):
     try:
         drive_link = data.get("drive_link")
@@ -45,109 +287,242 @@ def process_transcription(data):
 
         # Extract file_id from drive_link if necessary.
         if drive_link and not file_id:
-            try:
-                parts = drive_link.split('/file/d/')
-                if len(parts) > 1:
-                    file_part = parts[1]
-                    file_id = file_part.split('/')[0]
-                else:
-                    logging.error("Could not extract file ID from drive_link.")
-                    return
-            except Exception as e:
-                logging.exception("Error parsing drive_link")
+            m = FILE_ID_RE.search(drive_link)
+            file_id = (m.group(1) or m.group(2)) if m else None
+            if not file_id:
+                logging.error("Could not extract file ID from drive_link.")
                 return
 
         if not file_id:
             logging.error("No file_id provided or found.")
             return
 
-        # Download the video from Google Drive.
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".mp4") as temp_video:
-            temp_video_path = temp_video.name
-        logging.info("Starting file download from Drive...")
-        request_drive = drive_service.files().get_media(fileId=file_id)
-        with io.FileIO(temp_video_path, 'wb') as fh:
-            downloader = MediaIoBaseDownload(fh, request_drive)
-            done = False
-            while not done:
-                status, done = downloader.next_chunk()
-                if status:
-                    logging.info(f"Download progress: {int(status.progress() * 100)}%")
-        logging.info("File download complete.")
-
-        # Convert the video to audio using ffmpeg.
-        temp_audio_path = temp_video_path.replace(".mp4", ".wav")
-        logging.info("Starting ffmpeg conversion...")
-        command = [
-            "ffmpeg",
-            "-i", temp_video_path,
-            "-ac", "1",           # mono channel
-            "-ar", "16000",       # sample rate
-            "-y",                 # overwrite output file
-            temp_audio_path
-        ]
-        subprocess.run(command, check=True)
-        logging.info("ffmpeg conversion complete.")
+        drive_service = get_drive_service()
+        meta = drive_service.files().get(
+            fileId=file_id,
+            fields="size,md5Checksum,videoMediaMetadata(durationMillis)"
+        ).execute()
+        video_size = int(meta.get("size", 0))
+        duration_secs = int(meta.get("videoMediaMetadata", {}).get("durationMillis", 0)) / 1000
 
-        # Check audio file size.
-        audio_size = os.path.getsize(temp_audio_path)
-        logging.info(f"Audio file size: {audio_size} bytes")
+        # Serve repeated requests for the same content from the cache.
+        md5 = meta.get("md5Checksum")
+        if md5:
+            cached = transcript_cache_get(md5)
+            if cached is not None:
+                logging.info(f"Transcript cache hit for md5 {md5}.")
+                webhook_response = requests.post(WEBHOOK_URL, json={"transcript": cached})
+                logging.info(f"Webhook response: {webhook_response.status_code} - {webhook_response.text}")
+                return
+        media_url = drive_service.files().get_media(fileId=file_id).uri
+        session = get_auth_session()
 
-        # Prepare Speech-to-Text configuration.
-        config = speech.RecognitionConfig(
-            encoding=speech.RecognitionConfig.AudioEncoding.LINEAR16,
-            sample_rate_hertz=16000,
-            language_code="en-US"
-        )
+        # With the local backend everything is transcribed in-process from
+        # PCM. On Google, short videos are recognized over the streaming API;
+        # longer ones (or unknown durations) go through GCS + asynchronous
+        # recognition. The choice also drives the ffmpeg output format below.
+        use_local = TRANSCRIBER == "whisper"
+        use_streaming = not use_local and 0 < duration_secs <= STREAMING_LIMIT_SECS
+
+        # Large videos are fetched with parallel range requests into a temp
+        # file; small ones stream straight into ffmpeg's stdin so decoding
+        # overlaps the download.
+        temp_video_path = None
+        if video_size > PARALLEL_DOWNLOAD_THRESHOLD:
+            with tempfile.NamedTemporaryFile(delete=False, suffix=".mp4") as temp_video:
+                temp_video_path = temp_video.name
+            logging.info(
+                f"Video is {video_size} bytes; downloading with "
+                f"{DOWNLOAD_WORKERS} parallel range requests..."
+            )
+            download_ranges(session, media_url, video_size, temp_video_path)
+            logging.info("Parallel download complete.")
+        else:
+            logging.info("Starting streamed download and extraction from Drive...")
+
+        # When the source already carries a mono audio track in a codec STT
+        # accepts directly, skip re-encoding entirely and just remux
+        # (-c:a copy); ffmpeg then only demuxes, at near-zero CPU cost. Only
+        # probeable for file inputs, and the local Whisper backend always
+        # needs raw PCM.
+        copy_encoding = None
+        copy_rate = None
+        if temp_video_path and not use_local:
+            info = probe_audio_stream(temp_video_path)
+            if info:
+                codec, rate, channels = info
+                if channels == 1 and 8000 <= rate <= 48000:
+                    if codec == "opus":
+                        copy_encoding = speech.RecognitionConfig.AudioEncoding.OGG_OPUS
+                        copy_rate = rate
+                        copy_container = "ogg"
+                    elif codec == "flac":
+                        copy_encoding = speech.RecognitionConfig.AudioEncoding.FLAC
+                        copy_rate = rate
+                        copy_container = "flac"
+                if copy_encoding is not None:
+                    logging.info(f"Audio track is {codec}@{rate}Hz; copying without re-encoding.")
 
-        # Transcribe audio.
-        if audio_size > 10 * 1024 * 1024:  # Larger than 10 MB.
-            logging.info("Audio file exceeds 10MB; using asynchronous transcription.")
-            # Upload audio to GCS and use asynchronous transcription.
-            bucket = storage_client.bucket(GCS_BUCKET)
-            blob_name = os.path.basename(temp_audio_path)
-            blob = bucket.blob(blob_name)
-            blob.upload_from_filename(temp_audio_path)
-            gcs_uri = f"gs://{GCS_BUCKET}/{blob_name}"
-            logging.info(f"Uploaded audio to {gcs_uri}")
-
-            audio = speech.RecognitionAudio(uri=gcs_uri)
-            operation = speech_client.long_running_recognize(config=config, audio=audio)
-            logging.info("Asynchronous transcription operation started.")
-            # Poll progress every 30 seconds.
-            start_time = time.time()
-            while not operation.done():
-                elapsed = time.time() - start_time
-                logging.info(f"Asynchronous transcription in progress: {int(elapsed)} seconds elapsed...")
-                time.sleep(30)
-            response = operation.result(timeout=3600)  # Increase timeout as needed.
-            logging.info("Asynchronous transcription operation completed.")
-            # Optionally, delete the blob.
-            blob.delete()
+        if copy_encoding is not None:
+            audio_args = ["-f", copy_container, "-c:a", "copy"]
         else:
-            logging.info("Using synchronous transcription.")
-            # Synchronous transcription.
-            with open(temp_audio_path, "rb") as audio_file:
-                content = audio_file.read()
-            audio = speech.RecognitionAudio(content=content)
-            response = speech_client.recognize(config=config, audio=audio)
-            logging.info("Synchronous transcription completed.")
-
-        logging.info("Transcription complete. Building transcript...")
-        # Build transcript string.
-        transcript = ""
-        for idx, result in enumerate(response.results):
-            part = result.alternatives[0].transcript
-            transcript += part
-            logging.info(f"Transcript part {idx+1}: {part}")
+            if use_streaming or use_local:
+                # Raw signed 16-bit LE samples; headerless LINEAR16 is accepted
+                # by Speech-to-Text as-is, and Whisper consumes PCM directly.
+                format_args = ["-f", "s16le", "-acodec", "pcm_s16le"]
+            else:
+                # The async path uploads to GCS and STT reads it back, so network
+                # bytes matter: FLAC losslessly halves the payload vs raw PCM.
+                format_args = ["-f", "flac", "-c:a", "flac", "-compression_level", "5"]
+            audio_args = format_args + [
+                "-ac", "1",                 # mono channel
+                "-ar", "16000",             # sample rate
+            ]
+
+        command = ["ffmpeg"]
+        command += ["-i", temp_video_path if temp_video_path else "pipe:0"]
+        command += ["-vn"] + audio_args + ["pipe:1"]
+        proc = subprocess.Popen(
+            command,
+            stdin=None if temp_video_path else subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL
+        )
+
+        feeder = None
+        if not temp_video_path:
+            drive_response = session.get(media_url, stream=True)
+            drive_response.raise_for_status()
+
+            def feed_ffmpeg():
+                try:
+                    for chunk in drive_response.iter_content(chunk_size=1 << 20):
+                        proc.stdin.write(chunk)
+                except BrokenPipeError:
+                    logging.warning("ffmpeg closed its input early; stopping download feed.")
+                finally:
+                    proc.stdin.close()
+
+            feeder = threading.Thread(target=feed_ffmpeg)
+            feeder.start()
+
+        audio_stream = proc.stdout
+
+        try:
+            # Prepare Speech-to-Text configuration to match the ffmpeg output.
+            if not use_local:
+                if copy_encoding is not None:
+                    encoding, sample_rate = copy_encoding, copy_rate
+                elif use_streaming:
+                    encoding, sample_rate = speech.RecognitionConfig.AudioEncoding.LINEAR16, 16000
+                else:
+                    encoding, sample_rate = speech.RecognitionConfig.AudioEncoding.FLAC, 16000
+                config = speech.RecognitionConfig(
+                    encoding=encoding,
+                    sample_rate_hertz=sample_rate,
+                    language_code="en-US"
+                )
+
+            # Transcribe audio. The local backend decodes the whole PCM buffer
+            # in-process with no network round-trip. On Google, short videos are
+            # recognized while ffmpeg is still decoding by streaming PCM chunks
+            # straight off its stdout; recognition starts before the download
+            # finishes.
+            if use_local:
+                logging.info("Transcribing locally with Whisper.")
+                import numpy as np  # Optional dependency, only for the local path.
+                samples = np.frombuffer(audio_stream.read(), dtype=np.int16)
+                samples = samples.astype(np.float32) / 32768.0
+                segments, _ = get_whisper_model().transcribe(samples, beam_size=1)
+                parts = []
+                for segment in segments:
+                    parts.append(segment.text)
+                    logging.info(f"Transcript part {len(parts)}: {parts[-1]}")
+                transcript = "".join(parts)
+                logging.info("Local transcription completed.")
+            elif use_streaming:
+                logging.info("Using streaming recognition fed from the ffmpeg pipe.")
+                streaming_config = speech.StreamingRecognitionConfig(config=config)
+
+                def request_stream():
+                    # The client helper prepends the config request itself; only
+                    # audio content belongs in this iterator.
+                    while True:
+                        chunk = audio_stream.read(STREAMING_CHUNK_BYTES)
+                        if not chunk:
+                            break
+                        yield speech.StreamingRecognizeRequest(audio_content=chunk)
+
+                responses = get_speech_client().streaming_recognize(streaming_config, request_stream())
+                parts = []
+                for response in responses:
+                    for result in response.results:
+                        if result.is_final:
+                            parts.append(result.alternatives[0].transcript)
+                            logging.info(f"Transcript part {len(parts)}: {parts[-1]}")
+                transcript = "".join(parts)
+                logging.info("Streaming transcription completed.")
+            else:
+                logging.info("Using asynchronous transcription; streaming audio to GCS.")
+                # Pipe ffmpeg's output straight into a resumable chunked GCS
+                # upload, so the audio never sits fully in memory or on disk.
+                if copy_encoding == speech.RecognitionConfig.AudioEncoding.OGG_OPUS:
+                    blob_name, content_type = f"{file_id}.ogg", "audio/ogg"
+                else:
+                    blob_name, content_type = f"{file_id}.flac", "audio/flac"
+                bucket = get_storage_client().bucket(GCS_BUCKET)
+                blob = bucket.blob(blob_name, chunk_size=GCS_UPLOAD_CHUNK_SIZE)
+                # Read the pipe straight into the uploader's chunk buffers; the
+                # wrapper also answers the tell() calls the resumable upload
+                # makes, which the raw pipe cannot.
+                upload_source = PipeAudioReader(proc.stdout.fileno())
+                blob.upload_from_file(
+                    upload_source,
+                    content_type=content_type,
+                    size=None,
+                    checksum="crc32c"
+                )
+                gcs_uri = f"gs://{GCS_BUCKET}/{blob_name}"
+                logging.info(f"Uploaded audio to {gcs_uri}")
+
+                audio = speech.RecognitionAudio(uri=gcs_uri)
+                operation = get_speech_client().long_running_recognize(config=config, audio=audio)
+                logging.info("Asynchronous transcription operation started.")
+                # Poll progress every 30 seconds.
+                start_time = time.time()
+                while not operation.done():
+                    elapsed = time.time() - start_time
+                    logging.info(f"Asynchronous transcription in progress: {int(elapsed)} seconds elapsed...")
+                    time.sleep(30)
+                response = operation.result(timeout=3600)  # Increase timeout as needed.
+                logging.info("Asynchronous transcription operation completed.")
+                # Optionally, delete the blob.
+                blob.delete()
+
+                parts = [result.alternatives[0].transcript for result in response.results]
+                for idx, part in enumerate(parts):
+                    logging.info(f"Transcript part {idx+1}: {part}")
+                transcript = "".join(parts)
+
+            if proc.wait() != 0:
+                raise subprocess.CalledProcessError(proc.returncode, proc.args)
+        finally:
+            # A failed upload or RPC must not leave ffmpeg running or the
+            # feeder thread writing into a dead pipe.
+            if proc.poll() is None:
+                proc.kill()
+                proc.wait()
+            if feeder:
+                feeder.join()
 
         logging.info(f"Final transcript length: {len(transcript)} characters")
 
-        # Clean up temporary files.
-        if os.path.exists(temp_video_path):
+        if md5:
+            transcript_cache_put(md5, transcript)
+
+        # Clean up the temporary video file, if one was used.
+        if temp_video_path and os.path.exists(temp_video_path):
             os.remove(temp_video_path)
-        if os.path.exists(temp_audio_path):
-            os.remove(temp_audio_path)
 
         # Send the transcript to the webhook.
         payload = {"transcript": transcript}
@@ -169,8 +544,8 @@ def transcribe_endpoint():
     if not data:
         logging.error("No JSON data received.")
         return jsonify({"error": "No JSON data found"}), 400
-    # Start the background transcription process.
-    threading.Thread(target=process_transcription, args=(data,)).start()
+    # Hand the transcription off to the bounded worker pool.
+    EXECUTOR.submit(process_transcription, data)
     # Immediately return a success response.
     return jsonify({"status": "accepted", "message": "Transcription processing started."}), 200
 
@@ -179,4 +554,5 @@ def index():
     return "Cloud Run video transcriber is up. Send a POST request to /transcribe."
 
 if __name__ == "__main__":
+    # Local development only; production serves through gunicorn (see Dockerfile).
     app.run(host="0.0.0.0", port=int(os.environ.get("PORT", 8080)))